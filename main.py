@@ -2,21 +2,48 @@
 from __future__ import annotations
 
 import asyncio
+import atexit
+import binascii
+import csv
+import hashlib
 import logging
 import os
+import queue
+import random
+import re
 import time
-from typing import List, Optional, Dict, Any
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+from itertools import chain, islice
+from logging.handlers import QueueHandler, QueueListener
+from typing import List, Literal, Optional, Dict, Any, AsyncIterator, Deque, Iterable, Iterator, Tuple, Union
 
 import httpx
-from fastapi import FastAPI, HTTPException, Header, Body
-from pydantic import BaseModel, Field, validator
+import orjson
+from fastapi import FastAPI, HTTPException, Header, Body, Depends, Request
+from fastapi.middleware.gzip import GZipMiddleware
+from starlette.middleware.gzip import DEFAULT_EXCLUDED_CONTENT_TYPES
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel, Field, field_validator
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
 # Configure logging
-logging.basicConfig(level=logging.INFO)
+# Log records are queued and written by a background thread, so handler I/O never blocks the event loop
+_log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+_log_handler = logging.StreamHandler()
+_log_handler.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+_log_listener = QueueListener(_log_queue, _log_handler)
+if not logging.getLogger().handlers:
+    logging.getLogger().addHandler(QueueHandler(_log_queue))
+    logging.getLogger().setLevel(logging.INFO)
+    _log_listener.start()
+    atexit.register(_log_listener.stop)
 logger = logging.getLogger(__name__)
 
 # Gcore API configuration via environment variables (with safe defaults)
@@ -27,6 +54,26 @@ STATUS_PATH = os.getenv("GCORE_STATUS_PATH", "/billing/v1/org/files/{uuid}")
 DOWNLOAD_PATH = os.getenv("GCORE_DOWNLOAD_PATH", "/billing/v1/org/files/{uuid}/download")
 AUTH_PATH = os.getenv("GCORE_AUTH_PATH", "/iam/auth/jwt/login")
 
+# How long resolved feature IDs per product are reused before re-fetching the catalog
+FEATURES_CACHE_TTL = float(os.getenv("GCORE_FEATURES_CACHE_TTL", "3600"))
+# Ask the features endpoint for the served products only (falls back to the full catalog if unsupported)
+FEATURES_SUPPORTS_FILTER = os.getenv("GCORE_FEATURES_SUPPORTS_FILTER", "").lower() in ("1", "true", "yes")
+
+# Status polling backoff (seconds) and retries on transient 5xx status responses
+POLL_BASE_S = float(os.getenv("GCORE_POLL_BASE", "1"))
+POLL_MAX_S = float(os.getenv("GCORE_POLL_MAX", "15"))
+STATUS_MAX_RETRIES = 5
+
+# Upper bound on concurrent Gcore requests, and retries (seconds) for 429 responses
+MAX_CONCURRENCY = int(os.getenv("GCORE_MAX_CONCURRENCY", "20"))
+RATE_LIMIT_MAX_RETRIES = 3
+RATE_LIMIT_BASE_S = 1.0
+RATE_LIMIT_MAX_S = 60.0
+
+# Downloaded reports kept in memory (LRU, per token) for repeat downloads; size 0 disables
+DOWNLOAD_CACHE_TTL = float(os.getenv("GCORE_DOWNLOAD_CACHE_TTL", "3600"))
+DOWNLOAD_CACHE_SIZE = int(os.getenv("GCORE_DOWNLOAD_CACHE_SIZE", "64"))
+
 # Authentication credentials
 GCORE_USERNAME = os.getenv("GCORE_USERNAME")
 GCORE_PASSWORD = os.getenv("GCORE_PASSWORD")
@@ -38,25 +85,81 @@ DOWNLOAD_URL_TPL = f"{API_BASE}{DOWNLOAD_PATH}"
 AUTH_URL = f"{API_BASE}{AUTH_PATH}"
 
 # Token cache
-_token_cache = {"token": None, "expires_at": 0}
+_token_cache = {"token": None, "expires_at": 0, "auth_header": {}}
+_token_lock = asyncio.Lock()
+
+# Shared client for all Gcore calls (reuses pooled connections across requests)
+_http_client: Optional[httpx.AsyncClient] = None
+_gcore_semaphore = asyncio.Semaphore(MAX_CONCURRENCY)
+
+# Feature index cache: (monotonic expiry, upper-cased product name -> feature ids)
+_feature_index: Optional[Tuple[float, Dict[str, List[int]]]] = None
+# ETag / Last-Modified of the catalog behind the cached index, used to revalidate it after the TTL
+_features_etag: Optional[str] = None
+_features_last_modified: Optional[str] = None
+_features_lock = asyncio.Lock()
+# Cleared when the backend turns out not to support filtering the catalog by product
+_features_filter_enabled = FEATURES_SUPPORTS_FILTER
+
+# Download cache: (token hash, uuid, format) -> (monotonic expiry, downloaded data), oldest first
+_download_cache: "OrderedDict[Tuple[str, str, str], Tuple[float, Any]]" = OrderedDict()
+
+# Report pipelines in progress: (product, start date, end date, format) -> task yielding (uuid, status, data)
+_reports_in_flight: Dict[Tuple[str, str, str, str], "asyncio.Task[Tuple[str, str, Any]]"] = {}
 
-app = FastAPI(title="Gcore Statistics Report API", version="1.0.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Application lifespan: open the shared Gcore client on startup and close it on shutdown."""
+    global _http_client
+    # Build the connection pool before the first request instead of on it
+    app.state.gcore_client = _gcore_http_client()
+    yield
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+_EXCEL_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+app = FastAPI(title="Gcore Statistics Report API", version="1.0.0", lifespan=lifespan)
+# Report bodies (JSON and CSV) are large and repetitive; compress them for clients that accept gzip.
+# .xlsx files are already zip archives, so they are sent as-is
+app.add_middleware(
+    GZipMiddleware,
+    minimum_size=1024,
+    exclude_content_types=(*DEFAULT_EXCLUDED_CONTENT_TYPES, _EXCEL_MEDIA_TYPE),
+)
 
 
 # ---------- Pydantic models ----------
 
-class SimpleReportRequest(BaseModel):
+class _ReportFormatModel(BaseModel):
+    """Base for request bodies carrying an output `format` (case-insensitive)."""
+    format: Literal["json", "csv", "excel"] = Field(default="json", description="Output format: json, csv, or excel")
+
+    @field_validator("format", mode="before")
+    @classmethod
+    def _lowercase_format(cls, v):
+        return v.lower() if isinstance(v, str) else v
+
+
+_DATE_RE = re.compile(r"\A\d{4}-\d{2}-\d{2}\Z")
+
+
+class SimpleReportRequest(_ReportFormatModel):
     gcore_user_id: str = Field(..., description="Target Gcore Client/User ID to filter (string or numeric).")
-    start_date: str = Field(..., pattern=r"^\d{4}-\d{2}-\d{2}$", description="Start date in YYYY-MM-DD format")
-    end_date: str = Field(..., pattern=r"^\d{4}-\d{2}-\d{2}$", description="End date in YYYY-MM-DD format")
-    format: str = Field(default="json", description="Output format: json, csv, or excel")
-    
-    @validator('format')
-    def validate_format(cls, v):
-        allowed_formats = ['json', 'csv', 'excel']
-        if v.lower() not in allowed_formats:
-            raise ValueError(f'Format must be one of: {", ".join(allowed_formats)}')
-        return v.lower()
+    start_date: str = Field(..., description="Start date in YYYY-MM-DD format")
+    end_date: str = Field(..., description="End date in YYYY-MM-DD format")
+
+    @field_validator("start_date", "end_date")
+    @classmethod
+    def _validate_date(cls, v: str) -> str:
+        # Cheap shape check first; strptime then rejects impossible dates like 2025-02-31
+        if not _DATE_RE.match(v):
+            raise ValueError("date must be in YYYY-MM-DD format")
+        datetime.strptime(v, "%Y-%m-%d")
+        return v
 
 
 class ReportResponse(BaseModel):
@@ -72,104 +175,211 @@ class ReportResponse(BaseModel):
 
 # ---------- Utilities ----------
 
+def _gcore_http_client() -> httpx.AsyncClient:
+    """Return the shared client used for all Gcore calls, creating it on first use."""
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.AsyncClient(
+            # Long read timeout for large report downloads; fail fast on connect/pool waits
+            timeout=httpx.Timeout(connect=5.0, read=300.0, write=10.0, pool=5.0),
+            http2=True,
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=100, keepalive_expiry=60.0),
+            # Sent on every Gcore call; httpx already advertises the encodings it can decode (gzip, deflate)
+            headers={"User-Agent": "gcore-usage/1.0.0"},
+        )
+    return _http_client
+
+
+def get_gcore_client(request: Request) -> httpx.AsyncClient:
+    """Dependency: the application's shared Gcore client, opened by the lifespan."""
+    client = getattr(request.app.state, "gcore_client", None)
+    return client if client is not None else _gcore_http_client()
+
+
+def _retry_after_seconds(r: httpx.Response) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date), if present."""
+    value = r.headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+async def _send(client: httpx.AsyncClient, method: str, url: str, *, stream: bool = False, **kwargs: Any) -> httpx.Response:
+    """Send a Gcore request, bounded by GCORE_MAX_CONCURRENCY and retried on 429.
+
+    Rate-limited requests wait for Retry-After when Gcore sends it, otherwise for
+    a decorrelated-jitter delay; the concurrency slot is released while waiting.
+    """
+    retry_delay = RATE_LIMIT_BASE_S
+    for attempt in range(RATE_LIMIT_MAX_RETRIES + 1):
+        async with _gcore_semaphore:
+            r = await client.send(client.build_request(method, url, **kwargs), stream=stream)
+        if r.status_code != 429 or attempt == RATE_LIMIT_MAX_RETRIES:
+            return r
+        await r.aclose()
+        retry_delay = min(RATE_LIMIT_MAX_S, random.uniform(RATE_LIMIT_BASE_S, retry_delay * 3))
+        retry_after = _retry_after_seconds(r)
+        delay = min(RATE_LIMIT_MAX_S, retry_delay if retry_after is None else retry_after)
+        logger.warning("Gcore rate limit hit on %s %s, retry %s/%s in %.1fs", method, url, attempt + 1, RATE_LIMIT_MAX_RETRIES, delay)
+        await asyncio.sleep(delay)
+    return r
+
+
+def _check_gcore_response(r: httpx.Response, action: str) -> None:
+    """Map Gcore error responses to API errors: 401 -> 401, any other 4xx/5xx -> 502."""
+    if r.status_code == 401:
+        logger.error("Invalid Gcore token - 401 Unauthorized")
+        raise HTTPException(401, "Invalid Gcore token.")
+    if r.is_error:
+        logger.error("Gcore %s failed with status %s", action, r.status_code)
+        raise HTTPException(502, f"Gcore {action} failed with status {r.status_code}.")
+
+
+@asynccontextmanager
+async def _stream(client: httpx.AsyncClient, method: str, url: str, **kwargs: Any):
+    """Like `client.stream`, but sent through `_send` (concurrency limit and 429 retries)."""
+    r = await _send(client, method, url, stream=True, **kwargs)
+    try:
+        yield r
+    finally:
+        await r.aclose()
+
+
+def _cached_token(current_time: float) -> Optional[str]:
+    """Return the cached token if it is still valid for at least 60 seconds."""
+    if _token_cache["token"] and _token_cache["expires_at"] > current_time + 60:
+        return _token_cache["token"]
+    return None
+
+
 async def _get_gcore_token() -> str:
-    """Get a valid Gcore access token, using cache if available."""
-    current_time = time.time()
-    
+    """Get a valid Gcore access token, using cache if available.
+
+    Refreshes are serialized: when the token expires, concurrent requests wait
+    for a single auth call instead of each hitting the auth endpoint.
+    """
     # Check if we have a valid cached token
-    if (_token_cache["token"] and 
-        _token_cache["expires_at"] > current_time + 60):  # 60 second buffer
+    token = _cached_token(time.time())
+    if token:
         logger.info("Using cached Gcore token")
-        return _token_cache["token"]
-    
-    # Validate credentials are available
-    if not GCORE_USERNAME or not GCORE_PASSWORD:
-        raise HTTPException(500, "Gcore credentials not configured. Set GCORE_USERNAME and GCORE_PASSWORD environment variables.")
-    
-    logger.info("Generating new Gcore token")
+        return token
     
-    # Generate new token
-    auth_payload = {
-        "username": GCORE_USERNAME,
-        "password": GCORE_PASSWORD
-    }
-    
-    async with httpx.AsyncClient(timeout=httpx.Timeout(30.0)) as client:
+    async with _token_lock:
+        # Another request may have refreshed the token while we were waiting
+        current_time = time.time()
+        token = _cached_token(current_time)
+        if token:
+            logger.info("Using Gcore token refreshed by a concurrent request")
+            return token
+
+        # Validate credentials are available
+        if not GCORE_USERNAME or not GCORE_PASSWORD:
+            raise HTTPException(500, "Gcore credentials not configured. Set GCORE_USERNAME and GCORE_PASSWORD environment variables.")
+        
+        logger.info("Generating new Gcore token")
+        
+        # Generate new token
+        auth_payload = {
+            "username": GCORE_USERNAME,
+            "password": GCORE_PASSWORD
+        }
+        
         try:
-            r = await client.post(
+            r = await _send(
+                _gcore_http_client(),
+                "POST",
                 AUTH_URL,
                 json=auth_payload,
-                headers={"Content-Type": "application/json"}
+                headers={"Content-Type": "application/json"},
+                timeout=30.0,
             )
             r.raise_for_status()
             
-            auth_response = r.json()
+            auth_response = orjson.loads(r.content)
             access_token = auth_response.get("access") or auth_response.get("access_token")
             
             if not access_token:
-                logger.error(f"No access token in auth response: {auth_response}")
+                logger.error("No access token in auth response: %s", auth_response)
                 raise HTTPException(502, "Failed to get access token from Gcore auth API")
             
             # Cache the token (assume 1 hour expiration if not specified)
             expires_in = auth_response.get("expires_in", 3600)
             _token_cache["token"] = access_token
             _token_cache["expires_at"] = current_time + expires_in
+            _token_cache["auth_header"] = {"Authorization": f"Bearer {access_token}"}
             
-            logger.info(f"Successfully generated and cached Gcore token (expires in {expires_in}s)")
+            logger.info("Successfully generated and cached Gcore token (expires in %ss)", expires_in)
             return access_token
             
         except httpx.HTTPStatusError as e:
-            logger.error(f"Gcore auth failed with status {e.response.status_code}: {e.response.text}")
+            logger.error("Gcore auth failed with status %s: %s", e.response.status_code, e.response.text)
             if e.response.status_code == 401:
                 raise HTTPException(401, "Invalid Gcore credentials")
             raise HTTPException(502, f"Gcore auth failed: {e.response.status_code}")
         except Exception as e:
-            logger.error(f"Unexpected error during Gcore auth: {str(e)}")
+            logger.error("Unexpected error during Gcore auth: %s", e)
             raise HTTPException(502, f"Failed to authenticate with Gcore: {str(e)}")
 
 def _bearer_header(token: str) -> Dict[str, str]:
+    # The header for the current token is built once at refresh time; callers must not mutate it
+    if token == _token_cache["token"]:
+        return _token_cache["auth_header"]
     return {"Authorization": f"Bearer {token}"}
 
+# Report formats mapped to the media types Gcore expects in the Accept header
+_FORMAT_MEDIA_TYPES = {
+    "json": "application/json",
+    "csv": "text/csv",
+    "excel": _EXCEL_MEDIA_TYPE,
+}
+
+# Accept header media types mapped to report formats
+_ACCEPT_FORMATS = {media_type: fmt for fmt, media_type in _FORMAT_MEDIA_TYPES.items()}
+
+
 def _parse_accept_header(accept_header: Optional[str]) -> str:
-    """Parse Accept header to determine format."""
+    """Parse Accept header to determine format (first recognized media type wins)."""
     if not accept_header:
         return "json"  # default
     
-    accept_header = accept_header.lower().strip()
-    
-    if "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet" in accept_header:
-        return "excel"
-    elif "text/csv" in accept_header:
-        return "csv"
-    elif "application/json" in accept_header:
-        return "json"
-    else:
-        return "json"  # default fallback
-
-def _strip_nulls(obj: Any) -> Any:
-    """Recursively remove None, null-like, and empty containers."""
-    null_like = (None, "", [], {})
-    if isinstance(obj, dict):
-        return {k: _strip_nulls(v) for k, v in obj.items() if v not in null_like}
-    if isinstance(obj, list):
-        cleaned = [_strip_nulls(x) for x in obj]
-        return [x for x in cleaned if x not in null_like]
-    return obj
-
-def _matches_client(row: Dict[str, Any], target: str) -> bool:
-    """Try several common keys to match the client/user id."""
-    t = str(target).strip()
-    for key in (
-        "client_id",
-        "clientId",
-        "client",
-        "client_code",
-        "clientCode",
-        "user_id",
-        "userId",
-        "Client ID",  # CSV header variant
-        "client id",  # defensive variant
-    ):
+    for part in accept_header.split(","):
+        media_type = part.split(";", 1)[0].strip().lower()
+        fmt = _ACCEPT_FORMATS.get(media_type)
+        if fmt:
+            return fmt
+    return "json"  # default fallback
+
+
+@lru_cache(maxsize=128)
+def _resolve_format(accept_header: Optional[str], body_format: str) -> str:
+    """Pick the output format: a non-JSON Accept header wins, otherwise the body `format`."""
+    format_from_header = _parse_accept_header(accept_header)
+    return format_from_header if format_from_header != "json" or body_format == "json" else body_format
+
+# Keys that may carry the client/user id of a row, in lookup order
+_MATCH_CLIENT_KEYS = (
+    "client_id",
+    "clientId",
+    "client",
+    "client_code",
+    "clientCode",
+    "user_id",
+    "userId",
+    "Client ID",  # CSV header variant
+    "client id",  # defensive variant
+)
+
+
+def _matches_client(row: Dict[str, Any], t: str) -> bool:
+    """Try several common keys to match the client/user id `t` (already str()-ed and stripped)."""
+    for key in _MATCH_CLIENT_KEYS:
         if key in row and row[key] is not None and str(row[key]).strip() == t:
             return True
     # fallback: nested "client": {"id": "..."}
@@ -181,60 +391,77 @@ def _matches_client(row: Dict[str, Any], target: str) -> bool:
     return False
 
 
-def _normalize_rows(raw: Any) -> List[Dict[str, Any]]:
-    """Normalize various Gcore report payload shapes into a list of row dicts.
+def _looks_like_dict_rows(value: Any) -> bool:
+    """Cheap check for a non-empty list of dicts: only the first and last items are inspected."""
+    return isinstance(value, list) and bool(value) and type(value[0]) is dict and type(value[-1]) is dict
+
+
+def _iter_rows(raw: Any) -> Iterable[Dict[str, Any]]:
+    """Iterate the rows of various Gcore report payload shapes as dicts.
 
     Supports:
     - list[dict]
     - {"data": list[dict]}
     - {"headers": list[str], "rows": list[list[Any]]}
     - {k: list[dict]|list[list]} (flattens first level)
-    """
-    rows: List[Dict[str, Any]] = []
 
-    # Already a list of dicts
-    if isinstance(raw, list) and all(isinstance(x, dict) for x in raw):
+    Payloads that already are a list of dicts are returned as-is; other shapes
+    are converted lazily, one row at a time, so no second full list is built.
+    """
+    # Already a list of dicts. Sampling the ends avoids a full scan of large payloads;
+    # downstream filtering skips any non-dict entry anyway.
+    if _looks_like_dict_rows(raw):
         return raw
 
     # Common wrapper with data
-    if isinstance(raw, dict) and isinstance(raw.get("data"), list):
-        data_list = raw.get("data")
-        if all(isinstance(x, dict) for x in data_list):
-            return data_list  # type: ignore
+    if isinstance(raw, dict) and _looks_like_dict_rows(raw.get("data")):
+        return raw["data"]
 
-    # headers + rows (tabular)
+    # headers + rows (tabular); zip truncates rows longer than the headers
     if (
         isinstance(raw, dict)
         and isinstance(raw.get("headers"), list)
         and isinstance(raw.get("rows"), list)
     ):
         headers = [str(h) for h in raw.get("headers", [])]
-        for row in raw.get("rows", []):
-            if isinstance(row, list):
-                obj: Dict[str, Any] = {}
-                for idx, val in enumerate(row):
-                    if idx < len(headers):
-                        obj[headers[idx]] = val
-                rows.append(obj)
-            elif isinstance(row, dict):
-                rows.append(row)
-        return rows
+        return (
+            dict(zip(headers, row)) if isinstance(row, list) else row
+            for row in raw.get("rows", [])
+            if isinstance(row, (list, dict))
+        )
 
     # Fallback: flatten dict-of-lists
     if isinstance(raw, dict):
-        for v in raw.values():
-            if isinstance(v, list):
-                # If list of dicts, extend directly
-                if all(isinstance(x, dict) for x in v):
-                    rows.extend(v)  # type: ignore
-                # If list of lists and we also have headers available somewhere
-                elif isinstance(raw.get("headers"), list):
-                    headers = [str(h) for h in raw.get("headers", [])]
-                    for r in v:
-                        if isinstance(r, list):
-                            obj = {headers[i]: r[i] for i in range(min(len(headers), len(r)))}
-                            rows.append(obj)
-    return rows
+        return _iter_flattened_rows(raw)
+    return []
+
+
+def _iter_flattened_rows(raw: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """Yield rows from every list value of a dict payload (first level only)."""
+    for v in raw.values():
+        if isinstance(v, list):
+            # If list of dicts, yield directly
+            if all(isinstance(x, dict) for x in v):
+                yield from v
+            # If list of lists and we also have headers available somewhere
+            elif isinstance(raw.get("headers"), list):
+                headers = [str(h) for h in raw.get("headers", [])]
+                yield from (dict(zip(headers, r)) for r in v if isinstance(r, list))
+
+
+# Field-name fragments marking ids, labels, dates, grouping or units rather than metrics
+_EXCLUDED_METRIC_SUBSTRINGS = (
+    "id", "code", "name", "title", "client", "user", "product",
+    "feature", "date", "from", "to", "group", "unit", "currency",
+    "status", "uuid", "type", "region", "zone", "country"
+)
+_EXCLUDED_METRIC_RE = re.compile("|".join(map(re.escape, _EXCLUDED_METRIC_SUBSTRINGS)))
+
+
+@lru_cache(maxsize=4096)
+def _is_excluded_metric_key(key: Any) -> bool:
+    """Return True if a field name looks like an identifier/label (report schemas repeat, so cache it)."""
+    return _EXCLUDED_METRIC_RE.search(str(key).lower()) is not None
 
 
 def _has_nonzero_metric(row: Dict[str, Any]) -> bool:
@@ -246,15 +473,8 @@ def _has_nonzero_metric(row: Dict[str, Any]) -> bool:
     if not isinstance(row, dict):
         return False
 
-    excluded_substrings = (
-        "id", "code", "name", "title", "client", "user", "product",
-        "feature", "date", "from", "to", "group", "unit", "currency",
-        "status", "uuid", "type", "region", "zone", "country"
-    )
-
     for key, value in row.items():
-        key_l = str(key).lower()
-        if any(sub in key_l for sub in excluded_substrings):
+        if _is_excluded_metric_key(key):
             continue
         # Accept ints/floats that are finite
         if isinstance(value, (int, float)):
@@ -271,527 +491,891 @@ def _has_nonzero_metric(row: Dict[str, Any]) -> bool:
     return False
 
 
+# Column names (and common variants) carrying the metric value of a report row
+_METRIC_VALUE_KEYS = (
+    "Metric value",
+    "metric value",
+    "metric_value",
+    "metricValue",
+    "Metric Value",
+)
+
+
+def _is_nonzero_value(val: Any) -> bool:
+    """Check that a single metric value (numeric or numeric-like string) is non-zero."""
+    if isinstance(val, (int, float)):
+        return val != 0
+    if isinstance(val, str):
+        s = val.strip().replace(",", "")
+        try:
+            return float(s) != 0.0
+        except Exception:
+            return False
+    return False
+
+
 def _metric_value_nonzero(row: Dict[str, Any]) -> bool:
     """Check that the specific column 'Metric value' (and common variants) is non-zero."""
     if not isinstance(row, dict):
         return False
-    candidate_keys = [
-        "Metric value",
-        "metric value",
-        "metric_value",
-        "metricValue",
-        "Metric Value",
-    ]
-    for key in candidate_keys:
+    for key in _METRIC_VALUE_KEYS:
         if key in row:
-            val = row[key]
-            # numeric or numeric-like string
-            if isinstance(val, (int, float)):
-                return val != 0
-            if isinstance(val, str):
-                s = val.strip().replace(",", "")
-                try:
-                    return float(s) != 0.0
-                except Exception:
-                    return False
-            return False
+            return _is_nonzero_value(row[key])
     # If the exact column isn't present, fall back to heuristic
     return _has_nonzero_metric(row)
 
 
-def _filter_by_client_and_metric(rows: List[Dict[str, Any]], target_client_id: str) -> List[Dict[str, Any]]:
-    """Filter rows to those matching the client id and non-zero Metric value.
+# Column names (and common variants) carrying the client id of a report row
+_CLIENT_ID_KEYS = ("Client ID", "client_id", "clientId", "client id")
+
+
+@lru_cache(maxsize=64)
+def _detect_keys_for_schema(schema: frozenset) -> Tuple[Optional[str], Optional[str]]:
+    """Return the (client id, metric value) column names present in a row schema."""
+    client_key = next((c for c in _CLIENT_ID_KEYS if c in schema), None)
+    metric_key = next((m for m in _METRIC_VALUE_KEYS if m in schema), None)
+    return client_key, metric_key
+
+
+def _iter_filtered_rows(rows: Iterable[Dict[str, Any]], target_client_id: str) -> Iterator[Dict[str, Any]]:
+    """Yield rows matching the client id and non-zero Metric value.
 
     Detects the best matching client and metric keys from candidates present in the rows.
+    `rows` may be any iterable (e.g. from `_iter_rows`) and is consumed exactly once;
+    rows are yielded lazily so callers can transform them in the same pass.
     """
-    if not rows:
-        return []
-
-    client_candidates = [
-        "Client ID", "client_id", "clientId", "client id",
-    ]
-    metric_candidates = [
-        "Metric value", "metric value", "metric_value", "metricValue", "Metric Value",
-    ]
+    if isinstance(rows, list):
+        head = rows[:10]
+    else:
+        rows_iter = iter(rows)
+        head = list(islice(rows_iter, 10))
+        rows = chain(head, rows_iter)
+    if not head:
+        return
 
-    # Determine keys by scanning the first few rows
+    # Gcore returns the same columns for every row of a product; resolve from the first row's schema
     client_key = None
     metric_key = None
-    for sample in rows[:10]:
-        if not isinstance(sample, dict):
-            continue
-        for c in client_candidates:
-            if c in sample:
-                client_key = c if client_key is None else client_key
-        for m in metric_candidates:
-            if m in sample:
-                metric_key = m if metric_key is None else metric_key
-        if client_key and metric_key:
-            break
+    if isinstance(head[0], dict):
+        client_key, metric_key = _detect_keys_for_schema(frozenset(head[0]))
+
+    # Heterogeneous rows: determine keys by scanning the first few rows
+    if not (client_key and metric_key):
+        client_key = None
+        metric_key = None
+        for sample in head:
+            if not isinstance(sample, dict):
+                continue
+            for c in _CLIENT_ID_KEYS:
+                if c in sample:
+                    client_key = c if client_key is None else client_key
+            for m in _METRIC_VALUE_KEYS:
+                if m in sample:
+                    metric_key = m if metric_key is None else metric_key
+            if client_key and metric_key:
+                break
 
-    logger.info(f"Detected client key: {client_key}, metric key: {metric_key}")
+    logger.info("Detected client key: %s, metric key: %s", client_key, metric_key)
 
     # Fallback to matcher/heuristic if keys not found
-    filtered: List[Dict[str, Any]] = []
     if client_key and metric_key:
+        target = str(target_client_id).strip()
+        skipped = 0
         dropped_client = 0
         dropped_zero = 0
+        kept = 0
         for r in rows:
             if not isinstance(r, dict):
+                skipped += 1
                 continue
             cid = r.get(client_key)
             if cid is None:
+                skipped += 1
                 continue
-            if str(cid).strip() != str(target_client_id).strip():
+            # CSV payloads carry ids as str; avoid the str() round-trip for them
+            if type(cid) is str:
+                if cid.strip() != target:
+                    dropped_client += 1
+                    continue
+            elif str(cid) != target:
                 dropped_client += 1
                 continue
-            if not _metric_value_nonzero({metric_key: r.get(metric_key)}):
+            if not _is_nonzero_value(r.get(metric_key)):
                 dropped_zero += 1
                 continue
-            filtered.append(r)
-        logger.info(f"Filter summary - total: {len(rows)}, matched client: {len(rows)-dropped_client}, non-zero metric kept: {len(filtered)}, zero-metric dropped: {dropped_zero}")
-        return filtered
+            kept += 1
+            yield r
+        total = skipped + dropped_client + dropped_zero + kept
+        logger.info("Filter summary - total: %s, matched client: %s, non-zero metric kept: %s, zero-metric dropped: %s", total, total - dropped_client, kept, dropped_zero)
+        return
 
     # If we cannot detect keys, use generic helpers
+    target = str(target_client_id).strip()
     for r in rows:
-        if not isinstance(r, dict):
-            continue
-        if not _matches_client(r, target_client_id):
+        if not isinstance(r, dict) or not _matches_client(r, target):
             continue
         if not _metric_value_nonzero(r):
             continue
-        filtered.append(r)
-    return filtered
+        yield r
+
 
-def _remove_zero_numeric_fields(row: Dict[str, Any]) -> Dict[str, Any]:
-    """Remove keys whose values are numeric zeros (0, 0.0, "0").
+def _filter_by_client_and_metric(
+    rows: Iterable[Dict[str, Any]], target_client_id: str
+) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """Filter rows to those matching the client id and non-zero Metric value.
 
-    Keeps non-numeric fields and nested structures, but prunes zero numerics.
+    Also returns the sorted union of keys across the kept rows, collected in the
+    same pass, for use as CSV fieldnames.
     """
-    if not isinstance(row, dict):
-        return row
+    filtered: List[Dict[str, Any]] = []
+    all_keys = set()
+    for row in _iter_filtered_rows(rows, target_client_id):
+        filtered.append(row)
+        all_keys.update(row)
+    return filtered, sorted(all_keys)
+
+
+def _filter_and_clean(rows: Iterable[Dict[str, Any]], target_client_id: str) -> List[Dict[str, Any]]:
+    """Filter rows and prune zero/null fields in a single pass."""
+    return [_clean_row(r) for r in _iter_filtered_rows(rows, target_client_id)]
+
+def _is_zero_numeric(val: Any) -> bool:
+    """Return True for numeric zeros, including numeric-like strings ("0", "0.00", "0,0")."""
+    if isinstance(val, (int, float)):
+        return val == 0
+    if isinstance(val, str):
+        s = val.strip().replace(",", "")
+        try:
+            return float(s) == 0
+        except Exception:
+            return False
+    return False
 
-    def is_zero_numeric(val: Any) -> bool:
-        if isinstance(val, (int, float)):
-            return val == 0
-        if isinstance(val, str):
-            s = val.strip().replace(",", "")
-            try:
-                return float(s) == 0
-            except Exception:
-                return False
+
+# Marker returned by _clean_value for values that should be pruned
+_DROP = object()
+
+
+def _clean_value(value: Any) -> Any:
+    """Clean a value recursively, returning `_DROP` if it should be removed.
+
+    Numeric zeros (0, 0.0, "0"), None and "" are dropped; dicts and lists are
+    cleaned recursively and dropped when nothing is left in them.
+    """
+    if isinstance(value, dict):
+        cleaned = {k: v for k, v in ((k, _clean_value(v)) for k, v in value.items()) if v is not _DROP}
+        return cleaned if cleaned else _DROP
+    if isinstance(value, list):
+        items = [v for v in map(_clean_value, value) if v is not _DROP]
+        return items if items else _DROP
+    if value is None or value == "" or _is_zero_numeric(value):
+        return _DROP
+    return value
+
+
+def _clean_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Remove numeric-zero and null/empty fields from a row in a single rebuild."""
+    return {k: v for k, v in ((k, _clean_value(v)) for k, v in row.items()) if v is not _DROP}
+
+
+class _LineBuffer:
+    """File-like sink for csv writers: `write` hands back the formatted line instead of storing it."""
+
+    def write(self, line: str) -> str:
+        return line
+
+
+class _LineFeed:
+    """Resumable line source for csv readers: more records can be queued after it runs dry."""
+
+    def __init__(self) -> None:
+        self.records: Deque[str] = deque()
+
+    def __iter__(self) -> "_LineFeed":
+        return self
+
+    def __next__(self) -> str:
+        if self.records:
+            return self.records.popleft()
+        raise StopIteration
+
+
+def _csv_line_ends_quoted(line: str, quoted: bool) -> bool:
+    """Whether a CSV line ends inside a quoted field (so its record continues on the next line).
+
+    `quoted` tells whether the line starts inside one. As with the csv module, a quote
+    only opens a field at the start of that field; elsewhere (`1,5" screen`) it is literal.
+    """
+    if not quoted and '"' not in line:
         return False
+    i, n = 0, len(line)
+    while True:
+        if quoted:
+            j = line.find('"', i)
+            if j < 0:
+                return True
+            if line.startswith('"', j + 1):  # escaped quote ("")
+                i = j + 2
+                continue
+            quoted = False
+            i = j + 1
+        elif line.startswith('"', i):
+            quoted = True
+            i += 1
+            continue
+        # Skip the rest of this unquoted field; the next one starts after the delimiter
+        j = line.find(",", i)
+        if j < 0:
+            return False
+        i = j + 1
 
-    cleaned: Dict[str, Any] = {}
-    for k, v in row.items():
-        if isinstance(v, dict):
-            nv = _remove_zero_numeric_fields(v)
-            if nv not in (None, {}, [], ""):
-                cleaned[k] = nv
-        elif isinstance(v, list):
-            nv_list = []
-            for item in v:
-                if isinstance(item, dict):
-                    sub = _remove_zero_numeric_fields(item)
-                    if sub not in (None, {}, [], ""):
-                        nv_list.append(sub)
-                elif not is_zero_numeric(item):
-                    nv_list.append(item)
-            if nv_list:
-                cleaned[k] = nv_list
-        else:
-            if not is_zero_numeric(v):
-                cleaned[k] = v
-    return cleaned
 
-async def _get_features(client: httpx.AsyncClient, token: str, product_names: List[str]) -> List[int]:
-    logger.info(f"Fetching features for products: {product_names}")
-    logger.info(f"Making request to: {FEATURES_URL}")
-    
-    r = await client.get(FEATURES_URL, headers=_bearer_header(token))
-    logger.info(f"Features API response status: {r.status_code}")
-    
-    if r.status_code == 401:
-        logger.error("Invalid Gcore token - 401 Unauthorized")
-        raise HTTPException(401, "Invalid Gcore token.")
-    r.raise_for_status()
-    
-    items = r.json()  # expected to be a list of feature objects
-    logger.info(f"Retrieved {len(items) if items else 0} features from API")
-    
-    feature_ids: List[int] = []
-    targets = set(product_names)  # e.g., {"CDN", "Cloud"}
-    logger.info(f"Looking for features matching: {targets}")
+async def _aiter_csv_rows(lines: AsyncIterator[str]) -> AsyncIterator[Dict[str, str]]:
+    """Parse CSV rows as lines arrive, without buffering the whole document.
 
+    Lines are grouped into complete records first (a line ending inside a quoted
+    field continues on the next one), so the reader is never handed half a
+    record when it catches up with the network.
+    """
+    feed = _LineFeed()
+    reader = csv.DictReader(feed)
+    pending: List[str] = []
+    quoted = False
+    async for line in lines:
+        pending.append(line)
+        quoted = _csv_line_ends_quoted(line, quoted)
+        if quoted:
+            continue
+        feed.records.append("\n".join(pending))
+        pending.clear()
+        for row in reader:
+            yield row
+    if pending:
+        feed.records.append("\n".join(pending))
+    for row in reader:
+        yield row
+
+
+def _iter_csv(rows: List[Dict[str, Any]], fieldnames: List[str]) -> Iterator[str]:
+    """Yield a CSV document line by line (header first) without buffering it whole."""
+    if not fieldnames:
+        return
+    writer = csv.DictWriter(_LineBuffer(), fieldnames=fieldnames)
+    yield writer.writeheader()
+    for row in rows:
+        yield writer.writerow(row)
+
+@lru_cache(maxsize=128)
+def _norm_product(name: str) -> str:
+    """Normalize a product name for feature index lookups (catalog names repeat across features)."""
+    return name.strip().upper()
+
+
+def _build_feature_index(items: Any) -> Dict[str, List[int]]:
+    """Index a feature catalog by upper-cased product name in a single pass."""
+    index: Dict[str, List[int]] = {}
     for it in items or []:
         # Defensive: tolerate variations in field names/casing
-        pname = (it.get("product_name_en") or it.get("productNameEn") or "").strip()
+        pname = _norm_product(it.get("product_name_en") or it.get("productNameEn") or it.get("product") or "")
         fid = it.get("id")
-        if pname in targets and isinstance(fid, int):
-            feature_ids.append(fid)
-            logger.info(f"Found feature {fid} for product {pname}")
+        if pname and isinstance(fid, int):
+            index.setdefault(pname, []).append(fid)
+    return {pname: sorted(set(ids)) for pname, ids in index.items()}
+
+
+def _cached_feature_index() -> Optional[Dict[str, List[int]]]:
+    """Return the cached feature index if its TTL has not expired."""
+    if _feature_index and _feature_index[0] > time.monotonic():
+        return _feature_index[1]
+    return None
+
+
+# Products served by the report endpoints; the one cached index covers all of them
+_FEATURES_FILTER_PARAMS = [("product_name_en", name) for name in ("CDN", "WAAP", "Cloud")]
+
+
+async def _fetch_feature_catalog(client: httpx.AsyncClient, headers: Dict[str, str]) -> httpx.Response:
+    """GET the feature catalog, narrowed to the served products with GCORE_FEATURES_SUPPORTS_FILTER.
+
+    If the backend rejects the filter (a 4xx other than 401/429) or leaves out any of
+    the served products (e.g. it honours only one of the repeated params), filtering is switched off and the full catalog is fetched
+    instead. Transient failures (429, 5xx) are returned as-is for the caller to report.
+    """
+    global _features_filter_enabled
+    if not _features_filter_enabled:
+        return await _send(client, "GET", FEATURES_URL, headers=headers)
+
+    r = await _send(client, "GET", FEATURES_URL, headers=headers, params=_FEATURES_FILTER_PARAMS)
+    if r.is_success:
+        # The filtered catalog is small, so decoding it twice for this check is cheap
+        index = _build_feature_index(orjson.loads(r.content))
+        if all(_norm_product(name) in index for _, name in _FEATURES_FILTER_PARAMS):
+            return r
+    elif not r.is_client_error or r.status_code in (401, 429):
+        return r
+    logger.warning("Features endpoint does not support product filtering (status %s); fetching the full catalog", r.status_code)
+    _features_filter_enabled = False
+    # Validators of the filtered catalog do not apply to the full one
+    headers = {k: v for k, v in headers.items() if k not in ("If-None-Match", "If-Modified-Since")}
+    return await _send(client, "GET", FEATURES_URL, headers=headers)
+
+
+async def _get_feature_index(client: httpx.AsyncClient, token: str) -> Dict[str, List[int]]:
+    """Return the product -> feature IDs index, re-fetching the catalog once the TTL expires.
+
+    Fetches are serialized: concurrent requests that find the index expired wait
+    for a single catalog request instead of each calling the features endpoint.
+    """
+    global _feature_index, _features_etag, _features_last_modified
+    # The feature catalog rarely changes; reuse the index until the TTL expires
+    index = _cached_feature_index()
+    if index is not None:
+        logger.info("Using cached feature index")
+        return index
+
+    async with _features_lock:
+        # Another request may have refreshed the index while we were waiting
+        index = _cached_feature_index()
+        if index is not None:
+            logger.info("Using feature index refreshed by a concurrent request")
+            return index
+
+        logger.info("Making request to: %s", FEATURES_URL)
+        
+        headers = _bearer_header(token)
+        if _feature_index and (_features_etag or _features_last_modified):
+            # Revalidate the cached catalog instead of downloading it again
+            headers = dict(headers)
+            if _features_etag:
+                headers["If-None-Match"] = _features_etag
+            if _features_last_modified:
+                headers["If-Modified-Since"] = _features_last_modified
+        r = await _fetch_feature_catalog(client, headers)
+        logger.info("Features API response status: %s", r.status_code)
+        
+        if r.status_code == 304 and _feature_index:
+            logger.info("Feature catalog not modified; reusing cached index")
+            _feature_index = (time.monotonic() + FEATURES_CACHE_TTL, _feature_index[1])
+            return _feature_index[1]
+        _check_gcore_response(r, "feature catalog request")
+        
+        items = orjson.loads(r.content)  # expected to be a list of feature objects
+        logger.info("Retrieved %s features from API", len(items) if items else 0)
+
+        index = _build_feature_index(items)
+        _feature_index = (time.monotonic() + FEATURES_CACHE_TTL, index)
+        _features_etag = r.headers.get("etag")
+        _features_last_modified = r.headers.get("last-modified")
+        return index
+
+
+async def _get_features(client: httpx.AsyncClient, token: str, product_names: List[str]) -> List[int]:
+    logger.info("Fetching features for products: %s", product_names)
+    return _select_features(await _get_feature_index(client, token), product_names)
+
+
+def _select_features(index: Dict[str, List[int]], product_names: List[str]) -> List[int]:
+    """Feature IDs for the given products from a feature index; 400 if there are none."""
+    feature_ids: List[int] = []
+    for pname in product_names:  # e.g., ["CDN", "Cloud"]
+        ids = index.get(_norm_product(pname), [])
+        feature_ids.extend(ids)
+        logger.info("Found features %s for product %s", ids, pname)
 
-    logger.info(f"Total feature IDs found: {feature_ids}")
+    logger.info("Total feature IDs found: %s", feature_ids)
     if not feature_ids:
-        logger.error(f"No feature IDs found for products: {product_names}")
+        logger.error("No feature IDs found for products: %s", product_names)
         raise HTTPException(400, "No feature IDs found for the requested products (CDN/CLOUD/WAAP).")
+
     return sorted(set(feature_ids))
 
 
+# Fixed part of every report request; only the date range and features vary
+_REPORT_TEMPLATE: Dict[str, Any] = {
+    "template_code": "ResellerStatistics",
+    "parameters": {
+        # group by client so we can filter to the exact Gcore user ID;
+        # product/feature groups make the output richer but are optional
+        "group_by": ["client"],
+    },
+}
+
+
 async def _start_report(client: httpx.AsyncClient, token: str, date_from: str, date_to: str, feature_ids: List[int]) -> str:
     payload = {
-        "template_code": "ResellerStatistics",
+        "template_code": _REPORT_TEMPLATE["template_code"],
         "parameters": {
+            **_REPORT_TEMPLATE["parameters"],
             "date_from": date_from,
             "date_to": date_to,
-            # group by client so we can filter to the exact Gcore user ID;
-            # product/feature groups make the output richer but are optional
-            "group_by": ["client"],
-            "features": feature_ids
-        }
+            "features": feature_ids,
+        },
     }
     
-    logger.info(f"Starting report generation with payload: {payload}")
-    logger.info(f"Making request to: {GENERATE_URL}")
+    logger.debug("Starting report generation with payload: %s", payload)
+    logger.info("Making request to: %s", GENERATE_URL)
     
-    r = await client.post(GENERATE_URL, json=payload, headers=_bearer_header(token))
-    logger.info(f"Report generation API response status: {r.status_code}")
-    
-    if r.status_code == 401:
-        logger.error("Invalid Gcore token - 401 Unauthorized")
-        raise HTTPException(401, "Invalid Gcore token.")
+    # Serialize with orjson and send the bytes as-is, bypassing httpx's stdlib json encoding
+    r = await _send(
+        client,
+        "POST",
+        GENERATE_URL,
+        content=orjson.dumps(payload),
+        headers={**_bearer_header(token), "Content-Type": "application/json"},
+    )
+    logger.info("Report generation API response status: %s", r.status_code)
     
     if r.status_code not in [200, 201]:
-        logger.error(f"Report generation failed with status {r.status_code}: {r.text}")
-        r.raise_for_status()
+        logger.error("Report generation failed with status %s: %s", r.status_code, r.text)
+    _check_gcore_response(r, "report generation")
     
-    js = r.json() or {}
-    logger.info(f"Report generation response: {js}")
+    js = orjson.loads(r.content) or {}
+    logger.debug("Report generation response: %s", js)
     
     # Common response shape: { "uuid": "...", ... }
     uuid = js.get("uuid") or js.get("id") or js.get("file_uuid")
     if not uuid:
-        logger.error(f"No UUID found in response: {js}")
+        logger.error("No UUID found in response: %s", js)
         raise HTTPException(502, "Gcore did not return a report UUID.")
     
-    logger.info(f"Report generation started with UUID: {uuid}")
+    logger.info("Report generation started with UUID: %s", uuid)
     return uuid
 
 
-async def _wait_until_ready(client: httpx.AsyncClient, token: str, uuid: str, timeout_s: int, poll_s: int) -> str:
+async def _wait_until_ready(
+    client: httpx.AsyncClient,
+    token: str,
+    uuid: str,
+    timeout_s: int,
+    poll_base_s: float = POLL_BASE_S,
+    poll_max_s: float = POLL_MAX_S,
+) -> str:
+    """Poll the report status until it is ready, failed, or ``timeout_s`` elapses.
+
+    Polls back off exponentially (1, 2, 4, 8, then the cap, with the default base of 1s)
+    plus up to 25% random jitter, so quick reports are picked up early, slow ones are
+    not hammered, and concurrent waits do not poll in lockstep. Transient 5xx
+    responses from the status endpoint are retried with decorrelated jitter.
+    """
     status_url = STATUS_URL_TPL.format(uuid=uuid)
-    deadline = asyncio.get_event_loop().time() + timeout_s
     last_status = "unknown"
-    poll_count = 0
-
-    logger.info(f"Starting to poll report status for UUID: {uuid}")
-    logger.info(f"Status URL: {status_url}")
-    logger.info(f"Timeout: {timeout_s}s, Poll interval: {poll_s}s")
 
-    while True:
-        poll_count += 1
-        logger.info(f"Poll #{poll_count} - Checking status...")
-        
-        r = await client.get(status_url, headers=_bearer_header(token))
-        logger.info(f"Status check response: {r.status_code}")
-        
-        if r.status_code == 401:
-            logger.error("Invalid Gcore token - 401 Unauthorized")
-            raise HTTPException(401, "Invalid Gcore token.")
-        r.raise_for_status()
-        
-        js = r.json() or {}
-        logger.info(f"Status response: {js}")
-        
-        # status can be: ready / finished / done; failure: failed / error
-        status = (js.get("status") or js.get("state") or "").lower()
-        last_status = status or last_status
-        logger.info(f"Current status: '{status}' (last: '{last_status}')")
-
-        if status in {"ready", "finished", "done", "success", "succeeded", "available", "completed", "complete"}:
-            logger.info(f"Report is ready! Status: {status}")
-            return status
-        if status in {"failed", "error"}:
-            msg = js.get("message") or "Report generation failed."
-            logger.error(f"Report generation failed: {msg}")
-            raise HTTPException(502, f"Gcore report failed: {msg}")
-
-        elapsed = asyncio.get_event_loop().time() - (deadline - timeout_s)
-        if asyncio.get_event_loop().time() >= deadline:
-            logger.error(f"Timeout reached after {elapsed:.1f}s. Last status: {last_status}")
-            raise HTTPException(504, f"Timed out waiting for report (last status: {last_status}).")
-
-        logger.info(f"Report not ready yet, waiting {poll_s}s before next check...")
-        await asyncio.sleep(poll_s)
+    logger.info("Starting to poll report status for UUID: %s", uuid)
+    logger.debug("Status URL: %s", status_url)
+    logger.debug("Timeout: %ss, Poll backoff: %ss base, %ss max", timeout_s, poll_base_s, poll_max_s)
+
+    async def _poll_until_done() -> str:
+        nonlocal last_status
+        poll_count = 0
+        pending_polls = 0
+        retry_delay = poll_base_s
+        server_errors = 0
+        while True:
+            poll_count += 1
+            logger.debug("Poll #%d - Checking status...", poll_count)
+
+            r = await _send(client, "GET", status_url, headers=_bearer_header(token))
+            logger.debug("Status check response: %s", r.status_code)
+
+            if r.status_code >= 500 and server_errors < STATUS_MAX_RETRIES:
+                server_errors += 1
+                # Decorrelated jitter: next delay drawn from [base, 3 * previous delay]
+                retry_delay = min(poll_max_s, random.uniform(poll_base_s, retry_delay * 3))
+                logger.warning("Status check returned %s, retry %s/%s in %.1fs", r.status_code, server_errors, STATUS_MAX_RETRIES, retry_delay)
+                await asyncio.sleep(retry_delay)
+                continue
+            _check_gcore_response(r, "status check")
+            server_errors = 0
+            retry_delay = poll_base_s
+
+            js = orjson.loads(r.content) or {}
+            logger.debug("Status response: %s", js)
+
+            # status can be: ready / finished / done; failure: failed / error
+            status = (js.get("status") or js.get("state") or "").lower()
+            last_status = status or last_status
+            logger.debug("Current status: '%s' (last: '%s')", status, last_status)
+
+            if status in {"ready", "finished", "done", "success", "succeeded", "available", "completed", "complete"}:
+                logger.info("Report is ready! Status: %s", status)
+                return status
+            if status in {"failed", "error"}:
+                msg = js.get("message") or "Report generation failed."
+                logger.error("Report generation failed: %s", msg)
+                raise HTTPException(502, f"Gcore report failed: {msg}")
+
+            # Capped exponential delay plus 0-25% jitter
+            delay = min(poll_max_s, poll_base_s * 2 ** min(pending_polls, 4))
+            delay += random.uniform(0, 0.25 * delay)
+            pending_polls += 1
+            logger.debug("Report not ready yet, waiting %.1fs before next check...", delay)
+            await asyncio.sleep(delay)
+
+    # The deadline covers the whole loop, including a status request that stalls
+    try:
+        return await asyncio.wait_for(_poll_until_done(), timeout=timeout_s)
+    except asyncio.TimeoutError:
+        logger.error("Timeout reached after %ss. Last status: %s", timeout_s, last_status)
+        raise HTTPException(504, f"Timed out waiting for report (last status: {last_status}).")
 
 
 async def _download_report(client: httpx.AsyncClient, token: str, uuid: str, format: str = "json") -> Any:
     url = DOWNLOAD_URL_TPL.format(uuid=uuid)
     
     # Map format to Accept header (exactly as per Gcore documentation)
-    format_headers = {
-        "json": "application/json",
-        "csv": "text/csv", 
-        "excel": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-    }
-    
-    accept_header = format_headers.get(format, "application/json")
-    headers = _bearer_header(token) | {"Accept": accept_header}
+    accept_header = _FORMAT_MEDIA_TYPES.get(format, "application/json")
+    headers = {**_bearer_header(token), "Accept": accept_header}
     
-    logger.info(f"Downloading report from: {url} (format: {format})")
-    r = await client.get(url, headers=headers)
-    logger.info(f"Download response status: {r.status_code}; content-type: {r.headers.get('content-type')} ")
-    
-    if r.status_code == 401:
-        logger.error("Invalid Gcore token - 401 Unauthorized")
-        raise HTTPException(401, "Invalid Gcore token.")
-    r.raise_for_status()
+    logger.info("Downloading report from: %s (format: %s)", url, format)
+    async with _stream(client, "GET", url, headers=headers) as r:
+        logger.info("Download response status: %s (%s); content-type: %s ", r.status_code, r.http_version, r.headers.get("content-type"))
+        
+        _check_gcore_response(r, "report download")
 
-    content_type = (r.headers.get("content-type") or "").lower()
-    
-    # Handle different formats
-    if format == "csv" or "text/csv" in content_type:
-        import csv
-        logger.info("Processing CSV payload")
-        rows: List[Dict[str, Any]] = []
-        reader = csv.DictReader(r.text.splitlines())
-        for row in reader:
-            rows.append(row)
-        logger.info(f"Parsed CSV rows: {len(rows)}")
-        return rows
-    
-    elif format == "excel" or "spreadsheetml" in content_type:
-        logger.info("Received Excel file - returning base64 encoded binary data")
-        import base64
-        return {
-            "content_type": content_type,
-            "data": base64.b64encode(r.content).decode('utf-8'),  # Base64 encode for JSON serialization
-            "size_bytes": len(r.content),
-            "format": "excel"
-        }
+        content_type = (r.headers.get("content-type") or "").lower()
+        
+        # Handle different formats
+        if format == "csv" or "text/csv" in content_type:
+            logger.info("Processing CSV payload")
+            # Parse rows as lines arrive instead of buffering the whole body first
+            rows: List[Dict[str, Any]] = [row async for row in _aiter_csv_rows(r.aiter_lines())]
+            logger.info("Parsed CSV rows: %s", len(rows))
+            return rows
+        
+        content = await r.aread()
+
+    if format == "excel" or "spreadsheetml" in content_type:
+        logger.info("Received Excel file (%s bytes)", len(content))
+        return content
     
     else:  # JSON format (default)
         try:
-            data = r.json()
-            logger.info(f"Successfully downloaded JSON data with {len(data) if isinstance(data, (list, dict)) else 'unknown'} items")
+            data = orjson.loads(content)
+            logger.info("Successfully downloaded JSON data with %s items", len(data) if isinstance(data, (list, dict)) else "unknown")
             return data
         except Exception as e:
-            logger.warning(f"Failed to parse as JSON, trying text parsing: {e}")
-            # Attempt text->json if mislabelled
-            import json
-            data = json.loads(r.text)
-            logger.info(f"Successfully parsed text as JSON with {len(data) if isinstance(data, (list, dict)) else 'unknown'} items")
+            logger.warning("Failed to parse as JSON, trying text parsing: %s", e)
+            # Attempt text->json if mislabelled (e.g. a non-UTF-8 charset)
+            data = orjson.loads(r.text)
+            logger.info("Successfully parsed text as JSON with %s items", len(data) if isinstance(data, (list, dict)) else "unknown")
             return data
 
 
+def _download_cache_key(token: str, uuid: str, format: str) -> Tuple[str, str, str]:
+    # Scope entries to the token without keeping the token itself in memory
+    return (hashlib.sha256(token.encode()).hexdigest()[:16], uuid, format)
+
+
+async def _download_report_cached(client: httpx.AsyncClient, token: str, uuid: str, format: str = "json") -> Any:
+    """`_download_report` with a TTL cache: a ready report's contents never change."""
+    key = _download_cache_key(token, uuid, format)
+    cached = _download_cache.get(key)
+    if cached and cached[0] > time.monotonic():
+        logger.info("Using cached download for report %s (%s)", uuid, format)
+        _download_cache.move_to_end(key)
+        return cached[1]
+
+    data = await _download_report(client, token, uuid, format)
+    if DOWNLOAD_CACHE_SIZE > 0:
+        now = time.monotonic()
+        # Free expired entries (including those of rotated tokens) instead of waiting for a lookup
+        for stale in [k for k, (expiry, _) in _download_cache.items() if expiry <= now]:
+            del _download_cache[stale]
+        _download_cache[key] = (now + DOWNLOAD_CACHE_TTL, data)
+        _download_cache.move_to_end(key)
+        while len(_download_cache) > DOWNLOAD_CACHE_SIZE:
+            _download_cache.popitem(last=False)
+    return data
+
+
+async def _fetch_report(
+    client: httpx.AsyncClient,
+    token: str,
+    product_name: str,
+    start_date: str,
+    end_date: str,
+    format: str,
+    feature_index: Optional[Dict[str, List[int]]] = None,
+) -> Tuple[str, str, Any]:
+    """Generate a product report on Gcore, wait for it and download it; returns (uuid, status, data)."""
+    # 1) Get features for this specific product
+    logger.info("Step 1: Getting feature IDs...")
+    if feature_index is not None:
+        feature_ids = _select_features(feature_index, [product_name])
+    else:
+        feature_ids = await _get_features(client, token, [product_name])
+
+    # 2) Start report
+    logger.info("Step 2: Starting report generation...")
+    uuid = await _start_report(client, token, start_date, end_date, feature_ids)
+
+    # 3) Poll status (with longer timeout for report generation)
+    logger.info("Step 3: Waiting for report to be ready...")
+    status = await _wait_until_ready(client, token, uuid, 600)
+
+    # 4) Download report in requested format
+    logger.info("Step 4: Downloading report data in %s format...", format)
+    # A freshly generated report is downloaded once; only mode=download goes through the cache
+    raw = await _download_report(client, token, uuid, format)
+    return uuid, status, raw
+
+
+async def _fetch_report_shared(
+    client: httpx.AsyncClient,
+    token: str,
+    product_name: str,
+    start_date: str,
+    end_date: str,
+    format: str,
+    feature_index: Optional[Dict[str, List[int]]] = None,
+) -> Tuple[str, str, Any]:
+    """`_fetch_report`, joining an identical report that is already being generated.
+
+    Reports are grouped by client and filtered per user afterwards, so concurrent
+    requests for the same product, date range and format share one Gcore job. The
+    job is shielded: a caller disconnecting does not cancel it for the others.
+    """
+    key = (product_name, start_date, end_date, format)
+    task = _reports_in_flight.get(key)
+    if task is None:
+        task = asyncio.create_task(
+            _fetch_report(client, token, product_name, start_date, end_date, format, feature_index)
+        )
+        _reports_in_flight[key] = task
+
+        def _done(t: "asyncio.Task[Tuple[str, str, Any]]") -> None:
+            if _reports_in_flight.get(key) is t:
+                del _reports_in_flight[key]
+            if not t.cancelled():
+                t.exception()  # mark retrieved in case every caller went away
+
+        task.add_done_callback(_done)
+    else:
+        logger.info("Joining in-flight %s report for %s to %s (%s)", product_name, start_date, end_date, format)
+    return await asyncio.shield(task)
+
+
+def _excel_payload(content: bytes) -> Dict[str, Any]:
+    """Wrap a downloaded workbook for JSON responses (base64 encoded)."""
+    return {
+        "content_type": _EXCEL_MEDIA_TYPE,
+        "data": binascii.b2a_base64(content, newline=False).decode("ascii"),
+        "size_bytes": len(content),
+        "format": "excel"
+    }
+
+
 # ---------- API endpoints ----------
 
-async def _generate_report_for_product(product_name: str, body: SimpleReportRequest, accept_header: Optional[str] = None) -> ReportResponse:
-    """Common logic for generating reports for a specific product."""
-    logger.info(f"Starting report generation for product: {product_name}")
-    logger.info(f"Request details - User ID: {body.gcore_user_id}, Date range: {body.start_date} to {body.end_date}")
+async def _generate_report_for_product(
+    product_name: str,
+    body: SimpleReportRequest,
+    accept_header: Optional[str] = None,
+    raw_body: bool = False,
+    token: Optional[str] = None,
+    client: Optional[httpx.AsyncClient] = None,
+    feature_index: Optional[Dict[str, List[int]]] = None,
+) -> Union[ReportResponse, Response]:
+    """Common logic for generating reports for a specific product.
+
+    With `raw_body`, CSV and Excel reports are returned in their own media type
+    (a streamed `text/csv` body or the `.xlsx` file, with report metadata in
+    `X-Report-*` headers) instead of being wrapped in a JSON `ReportResponse`.
+    A `token` (and `feature_index`) already fetched by the caller is reused
+    instead of being looked up again, and `client` defaults to the shared Gcore client.
+    """
+    logger.info("Starting report generation for product: %s", product_name)
+    logger.info("Request details - User ID: %s, Date range: %s to %s", body.gcore_user_id, body.start_date, body.end_date)
     
-    # Get Gcore token internally
-    token = await _get_gcore_token()
-    logger.info(f"Using Gcore token: {token[:20]}...")
+    # Get Gcore token internally unless the caller already has one
+    if token is None:
+        token = await _get_gcore_token()
+    logger.debug("Using Gcore token: %s...", token[:20])
     
     # Determine format from Accept header or body parameter
-    format_from_header = _parse_accept_header(accept_header)
-    final_format = format_from_header if format_from_header != "json" or body.format == "json" else body.format
-    logger.info(f"Using format: {final_format} (from header: {format_from_header}, from body: {body.format})")
+    final_format = _resolve_format(accept_header, body.format)
+    logger.info("Using format: %s (Accept: %s, from body: %s)", final_format, accept_header, body.format)
 
-    async with httpx.AsyncClient(timeout=httpx.Timeout(300.0, read=300.0, write=60.0, connect=30.0)) as client:
-        # 1) Get features for this specific product
-        logger.info("Step 1: Getting feature IDs...")
-        feature_ids = await _get_features(client, token, [product_name])
-        
-        # 2) Start report
-        logger.info("Step 2: Starting report generation...")
-        uuid = await _start_report(client, token, body.start_date, body.end_date, feature_ids)
-        
-        # 3) Poll status (with longer timeout for report generation)
-        logger.info("Step 3: Waiting for report to be ready...")
-        status = await _wait_until_ready(client, token, uuid, 600, 10)
-        
-        # 4) Download report in requested format
-        logger.info(f"Step 4: Downloading report data in {final_format} format...")
-        raw = await _download_report(client, token, uuid, final_format)
+    if client is None:
+        client = _gcore_http_client()
+    uuid, status, raw = await _fetch_report_shared(
+        client, token, product_name, body.start_date, body.end_date, final_format, feature_index
+    )
 
     # Handle different formats
     if final_format == "excel":
-        # For Excel, return the base64 encoded binary data without processing
+        # For Excel, return the workbook as downloaded, without processing
+        if raw_body:
+            logger.info("Report generation completed successfully! UUID: %s, Status: %s, Format: Excel (raw), Size: %s bytes", uuid, status, len(raw))
+            return Response(
+                content=raw,
+                media_type=_EXCEL_MEDIA_TYPE,
+                headers={
+                    "Content-Disposition": f'attachment; filename="{product_name.lower()}-report-{uuid}.xlsx"',
+                    "X-Report-UUID": uuid,
+                    "X-Report-Status": status,
+                },
+            )
+
         logger.info("Excel format requested - returning base64 encoded binary data")
-        result = ReportResponse(
-            uuid=uuid, 
-            status=status, 
-            count=raw.get("size_bytes", 0) if isinstance(raw, dict) else 0, 
-            data=raw
-        )
-        logger.info(f"Report generation completed successfully! UUID: {uuid}, Status: {status}, Format: Excel, Size: {raw.get('size_bytes', 0)} bytes")
+        result = ReportResponse(uuid=uuid, status=status, count=len(raw), data=_excel_payload(raw))
+        logger.info("Report generation completed successfully! UUID: %s, Status: %s, Format: Excel, Size: %s bytes", uuid, status, len(raw))
         return result
     
     elif final_format == "csv":
         # For CSV, apply filtering but preserve original column structure
         logger.info("CSV format requested - applying filtering while preserving column structure")
-        rows: List[Dict[str, Any]] = _normalize_rows(raw)
-        logger.info(f"Total rows before filtering: {len(rows)}")
-
         # Filter to the target user/client id and non-zero Metric value (CSV-aware)
-        filtered = _filter_by_client_and_metric(rows, body.gcore_user_id)
-        logger.info(f"Rows after filtering for user {body.gcore_user_id} with non-zero 'Metric value': {len(filtered)}")
+        filtered, fieldnames = _filter_by_client_and_metric(_iter_rows(raw), body.gcore_user_id)
+        logger.info("Rows after filtering for user %s with non-zero 'Metric value': %s", body.gcore_user_id, len(filtered))
         
-        # Convert filtered data back to CSV format
-        if filtered:
-            import csv
-            import io
-            
-            # Get all unique keys from all rows to ensure consistent columns
-            all_keys = set()
-            for row in filtered:
-                all_keys.update(row.keys())
-            
-            # Sort keys to maintain consistent column order
-            fieldnames = sorted(all_keys)
-            
-            # Create CSV string
-            output = io.StringIO()
-            writer = csv.DictWriter(output, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(filtered)
-            csv_content = output.getvalue()
-            output.close()
-            
-            result = ReportResponse(uuid=uuid, status=status, count=len(filtered), data=csv_content)
-            logger.info(f"Report generation completed successfully! UUID: {uuid}, Status: {status}, Count: {len(filtered)}, Format: CSV")
-            return result
-        else:
-            # No data found
-            result = ReportResponse(uuid=uuid, status=status, count=0, data="")
-            logger.info(f"Report generation completed successfully! UUID: {uuid}, Status: {status}, Count: 0, Format: CSV")
-            return result
+        if raw_body:
+            # Stream the CSV body line by line instead of building it in memory
+            logger.info("Report generation completed successfully! UUID: %s, Status: %s, Count: %s, Format: CSV (streamed)", uuid, status, len(filtered))
+            return StreamingResponse(
+                _iter_csv(filtered, fieldnames),
+                media_type="text/csv",
+                headers={"X-Report-UUID": uuid, "X-Report-Status": status, "X-Report-Count": str(len(filtered))},
+            )
+
+        csv_content = "".join(_iter_csv(filtered, fieldnames))
+        result = ReportResponse(uuid=uuid, status=status, count=len(filtered), data=csv_content)
+        logger.info("Report generation completed successfully! UUID: %s, Status: %s, Count: %s, Format: CSV", uuid, status, len(filtered))
+        return result
     
     else:  # JSON format - apply filtering and cleaning
         logger.info("JSON format requested - processing and filtering data...")
-        rows: List[Dict[str, Any]] = _normalize_rows(raw)
-        logger.info(f"Total rows before filtering: {len(rows)}")
-
-        # Filter to the target user/client id and non-zero Metric value (CSV-aware)
-        filtered = _filter_by_client_and_metric(rows, body.gcore_user_id)
-        logger.info(f"Rows after filtering for user {body.gcore_user_id} with non-zero 'Metric value': {len(filtered)}")
-
-        # Remove numeric-zero fields, then strip null/empty recursively
-        without_zeros = [_remove_zero_numeric_fields(r) for r in filtered]
-        cleaned = [_strip_nulls(r) for r in without_zeros]
-        logger.info(f"Final cleaned data count: {len(cleaned)}")
+        # Filter to the target user/client id and non-zero Metric value, then remove
+        # numeric-zero fields and strip null/empty values, all in one pass over the rows
+        cleaned = _filter_and_clean(_iter_rows(raw), body.gcore_user_id)
+        logger.info("Rows after filtering and cleaning for user %s: %s", body.gcore_user_id, len(cleaned))
 
         result = ReportResponse(uuid=uuid, status=status, count=len(cleaned), data=cleaned)
-        logger.info(f"Report generation completed successfully! UUID: {uuid}, Status: {status}, Count: {len(cleaned)}, Format: {final_format}")
+        logger.info("Report generation completed successfully! UUID: %s, Status: %s, Count: %s, Format: %s", uuid, status, len(cleaned), final_format)
         return result
 
 
-@app.post("/reports/cdn", response_model=ReportResponse, summary="Generate CDN statistics report for a Gcore user")
+# CSV and Excel reports are sent as their own media type, with the report metadata in headers
+_REPORT_RESPONSES: Dict[Union[int, str], Dict[str, Any]] = {
+    200: {
+        "description": "JSON report envelope, a streamed CSV body (`Accept: text/csv`) or the raw `.xlsx` workbook",
+        "content": {
+            "text/csv": {"schema": {"type": "string"}},
+            _EXCEL_MEDIA_TYPE: {"schema": {"type": "string", "format": "binary"}},
+        },
+        "headers": {
+            "X-Report-UUID": {"description": "Gcore report UUID (CSV and Excel)", "schema": {"type": "string"}},
+            "X-Report-Status": {"description": "Final Gcore report status (CSV and Excel)", "schema": {"type": "string"}},
+            "X-Report-Count": {"description": "Number of CSV rows returned", "schema": {"type": "integer"}},
+        },
+    },
+}
+
+
+@app.post("/reports/cdn", response_model=ReportResponse, responses=_REPORT_RESPONSES, summary="Generate CDN statistics report for a Gcore user")
 async def generate_cdn_report(
     body: SimpleReportRequest = Body(...),
-    accept: Optional[str] = Header(None, alias="Accept")
+    accept: Optional[str] = Header(None, alias="Accept"),
+    client: httpx.AsyncClient = Depends(get_gcore_client),
 ):
     """Generate a CDN statistics report for the specified Gcore user and date range."""
     logger.info("=== CDN Report Request Received ===")
     try:
-        result = await _generate_report_for_product("CDN", body, accept)
+        result = await _generate_report_for_product("CDN", body, accept, raw_body=True, client=client)
         logger.info("=== CDN Report Request Completed Successfully ===")
         return result
     except Exception as e:
-        logger.error(f"=== CDN Report Request Failed: {str(e)} ===")
+        logger.error("=== CDN Report Request Failed: %s ===", e)
         raise
 
 
-@app.post("/reports/waap", response_model=ReportResponse, summary="Generate WAAP statistics report for a Gcore user")
+@app.post("/reports/waap", response_model=ReportResponse, responses=_REPORT_RESPONSES, summary="Generate WAAP statistics report for a Gcore user")
 async def generate_waap_report(
     body: SimpleReportRequest = Body(...),
-    accept: Optional[str] = Header(None, alias="Accept")
+    accept: Optional[str] = Header(None, alias="Accept"),
+    client: httpx.AsyncClient = Depends(get_gcore_client),
 ):
     """Generate a WAAP statistics report for the specified Gcore user and date range."""
-    return await _generate_report_for_product("WAAP", body, accept)
+    return await _generate_report_for_product("WAAP", body, accept, raw_body=True, client=client)
 
 
-@app.post("/reports/cloud", response_model=ReportResponse, summary="Generate CLOUD statistics report for a Gcore user")
+@app.post("/reports/cloud", response_model=ReportResponse, responses=_REPORT_RESPONSES, summary="Generate CLOUD statistics report for a Gcore user")
 async def generate_cloud_report(
     body: SimpleReportRequest = Body(...),
-    accept: Optional[str] = Header(None, alias="Accept")
+    accept: Optional[str] = Header(None, alias="Accept"),
+    client: httpx.AsyncClient = Depends(get_gcore_client),
 ):
     """Generate a CLOUD statistics report for the specified Gcore user and date range."""
-    return await _generate_report_for_product("Cloud", body, accept)
+    return await _generate_report_for_product("Cloud", body, accept, raw_body=True, client=client)
 
 
 @app.post("/reports/all", response_model=dict, summary="Generate reports for CDN, WAAP and CLOUD for a Gcore user")
 async def generate_all_reports(
     body: SimpleReportRequest = Body(...),
-    accept: Optional[str] = Header(None, alias="Accept")
+    accept: Optional[str] = Header(None, alias="Accept"),
+    client: httpx.AsyncClient = Depends(get_gcore_client),
 ):
     """Generate and return reports for CDN, WAAP, and CLOUD in one call."""
     logger.info("=== ALL Reports Request Received ===")
     result: Dict[str, Any] = {"cdn": {}, "waap": {}, "cloud": {}}
+
+    # Fetch the token and feature catalog once and share them, rather than have each pipeline await them
     try:
-        cdn = await _generate_report_for_product("CDN", body, accept)
-        if cdn.count > 0:
-            result["cdn"] = cdn.dict()
-    except HTTPException as e:
-        logger.info(f"CDN skipped due to error: {e.detail}")
-    
-    try:
-        waap = await _generate_report_for_product("WAAP", body, accept)
-        if waap.count > 0:
-            result["waap"] = waap.dict()
-    except HTTPException as e:
-        logger.info(f"WAAP skipped due to error: {e.detail}")
-    
-    try:
-        cloud = await _generate_report_for_product("Cloud", body, accept)
-        if cloud.count > 0:
-            result["cloud"] = cloud.dict()
+        token = await _get_gcore_token()
+        feature_index = await _get_feature_index(client, token)
     except HTTPException as e:
-        logger.info(f"Cloud skipped due to error: {e.detail}")
+        logger.info("All products skipped due to error: %s", e.detail)
+        return result
+
+    # The three pipelines are independent and mostly wait on Gcore, so run them concurrently
+    products = {"cdn": "CDN", "waap": "WAAP", "cloud": "Cloud"}
+    reports = await asyncio.gather(
+        *(_generate_report_for_product(name, body, accept, token=token, client=client, feature_index=feature_index)
+          for name in products.values()),
+        return_exceptions=True,
+    )
+    for (key, name), report in zip(products.items(), reports):
+        if isinstance(report, HTTPException):
+            logger.info("%s skipped due to error: %s", name, report.detail)
+            continue
+        if isinstance(report, BaseException):
+            raise report
+        if report.count > 0:
+            # Keep the model itself; .dict() would deep-copy the report data just to serialize it again
+            result[key] = report
     
     logger.info("=== ALL Reports Request Completed ===")
     return result
 
 
-class StatusRequest(BaseModel):
-    format: str = Field(default="json", description="Output format: json, csv, or excel")
-    
-    @validator('format')
-    def validate_format(cls, v):
-        allowed_formats = ['json', 'csv', 'excel']
-        if v.lower() not in allowed_formats:
-            raise ValueError(f'Format must be one of: {", ".join(allowed_formats)}')
-        return v.lower()
+class StatusRequest(_ReportFormatModel):
+    pass
 
 @app.post("/reports/gcore/{uuid}", summary="Check report status or fetch raw JSON (no cleaning)", response_model=dict)
 async def get_report_or_json(
     uuid: str,
     body: StatusRequest = Body(...),
     mode: str = "status",  # "status" or "download"
-    accept: Optional[str] = Header(None, alias="Accept")
+    accept: Optional[str] = Header(None, alias="Accept"),
+    client: httpx.AsyncClient = Depends(get_gcore_client),
 ):
     # Get Gcore token internally
     token = await _get_gcore_token()
     
     # Determine format from Accept header or body parameter
-    format_from_header = _parse_accept_header(accept)
-    final_format = format_from_header if format_from_header != "json" or body.format == "json" else body.format
-
-    async with httpx.AsyncClient(timeout=httpx.Timeout(300.0, read=300.0, write=60.0, connect=30.0)) as client:
-        if mode == "status":
-            r = await client.get(STATUS_URL_TPL.format(uuid=uuid), headers=_bearer_header(token))
-            if r.status_code == 401:
-                raise HTTPException(401, "Invalid Gcore token.")
-            r.raise_for_status()
-            return r.json()
-        elif mode == "download":
-            data = await _download_report(client, token, uuid, final_format)
-            return {"uuid": uuid, "format": final_format, "data": data}
-        else:
-            raise HTTPException(400, "mode must be 'status' or 'download'.")
+    final_format = _resolve_format(accept, body.format)
+
+    if mode == "status":
+        r = await _send(client, "GET", STATUS_URL_TPL.format(uuid=uuid), headers=_bearer_header(token))
+        _check_gcore_response(r, "status check")
+        return orjson.loads(r.content)
+    elif mode == "download":
+        data = await _download_report_cached(client, token, uuid, final_format)
+        if isinstance(data, bytes):
+            data = _excel_payload(data)
+        return {"uuid": uuid, "format": final_format, "data": data}
+    else:
+        raise HTTPException(400, "mode must be 'status' or 'download'.")
 
 
 @app.get("/", summary="Health check")
@@ -813,4 +1397,4 @@ async def detailed_health_check():
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8080)
+    uvicorn.run(app, host="0.0.0.0", port=8080, loop="uvloop", http="httptools")